@@ -7,7 +7,7 @@ from datetime import datetime
 
 import config
 
-from utils.browser import crear_navegador, cerrar_banners
+from utils.browser import crear_navegador, cerrar_banners, bloquear_recursos
 from utils.sso_google import login_con_google
 import utils.sage as sage
 import utils.sciencedirect as sd
@@ -221,11 +221,42 @@ def _sd_next(driver, timeout=20):
 
 # ---------------- Pipeline ----------------
 
+def _sd_paralelo(query, paginas_sd, sd_per_page, sd_workers):
+    """
+    ScienceDirect con `sd_workers` navegadores a la vez: cada uno hace su login SSO una
+    vez (puede pedir 2FA/CAPTCHA por navegador) y luego las páginas se reparten entre ellos,
+    abriendo cada SRP directamente con show/offset. Cada navegador descarga en su propia
+    subcarpeta (worker_i) de DOWNLOAD_DIR_SCIENCEDIRECT; load_ris_from_dirs las recorre.
+    """
+    URL_SD = getattr(config, "SCIENCEDIRECT_URL", "https://www-sciencedirect-com.crai.referencistas.com/")
+
+    def login(driver):
+        login_con_google(
+            driver=driver,
+            url_revista=URL_SD,
+            correo_institucional=config.USUARIO,
+            contrasena=config.CONTRASENA,
+            carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT,
+            dominio_objetivo="www-sciencedirect-com"
+        )
+        cerrar_banners(driver)
+
+    pool, carpetas = sd.crear_pool_sciencedirect(sd_workers, config.DOWNLOAD_DIR_SCIENCEDIRECT, preparar=login)
+    with pool:
+        print(f"→ SD: exportando {paginas_sd} página(s) con {pool.size} navegadores...")
+        sd.exportar_paginas_en_paralelo(
+            pool, carpetas, URL_SD, query,
+            paginas=paginas_sd,
+            per_page=sd_per_page,
+            consulta_slug=query.replace(" ", "-")
+        )
+
 def run_pipeline(
     query="generative artificial intelligence",
     paginas_sage=5,
     paginas_sd=5,
-    sd_per_page=100
+    sd_per_page=100,
+    sd_workers=1
 ):
     # -------- SAGE --------
     driver = crear_navegador(config.CHROMEDRIVER_PATH, config.DOWNLOAD_DIR_SAGE)
@@ -253,54 +284,59 @@ def run_pipeline(
         driver.quit()
 
     # -------- ScienceDirect --------
-    driver = crear_navegador(config.CHROMEDRIVER_PATH, config.DOWNLOAD_DIR_SCIENCEDIRECT)
-    try:
-        URL_SD = getattr(config, "SCIENCEDIRECT_URL", "https://www-sciencedirect-com.crai.referencistas.com/")
-        login_con_google(
-            driver=driver,
-            url_revista=URL_SD,
-            correo_institucional=config.USUARIO,
-            contrasena=config.CONTRASENA,
-            carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT,
-            dominio_objetivo="www-sciencedirect-com"
-        )
-        cerrar_banners(driver)
-
-        # abrir home + buscar
-        sd.abrir_home_sciencedirect(driver, URL_SD, config.DOWNLOAD_DIR_SCIENCEDIRECT)
-        sd.buscar_en_sciencedirect(driver, query, config.DOWNLOAD_DIR_SCIENCEDIRECT)
-
-        # forzar 100 por página: si el módulo lo trae, úsalo; si no, fallback local
-        if hasattr(sd, "fijar_resultados_por_pagina"):
-            sd.fijar_resultados_por_pagina(driver, per_page=sd_per_page, carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT)
-        else:
-            _sd_set_per_page_manual(driver, per_page=sd_per_page)
-
-        # paginar y descargar
-        if hasattr(sd, "descargar_varias_paginas_sd"):
-            sd.descargar_varias_paginas_sd(
-                driver,
+    if sd_workers > 1:
+        _sd_paralelo(query, paginas_sd, sd_per_page, sd_workers)
+    else:
+        driver = crear_navegador(config.CHROMEDRIVER_PATH, config.DOWNLOAD_DIR_SCIENCEDIRECT)
+        try:
+            URL_SD = getattr(config, "SCIENCEDIRECT_URL", "https://www-sciencedirect-com.crai.referencistas.com/")
+            login_con_google(
+                driver=driver,
+                url_revista=URL_SD,
+                correo_institucional=config.USUARIO,
+                contrasena=config.CONTRASENA,
                 carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT,
-                consulta_slug=query.replace(" ", "-"),
-                paginas=paginas_sd,
-                etiqueta_prefijo="p"
+                dominio_objetivo="www-sciencedirect-com"
             )
-        else:
-            # Fallback: descargar página actual + next x (paginas_sd-1)
-            for i in range(1, paginas_sd + 1):
-                _sd_export_ris_pagina(
+            # ya autenticados: dejar de bajar imágenes/fuentes/analítica (no antes: CAPTCHA/2FA)
+            bloquear_recursos(driver)
+            cerrar_banners(driver)
+
+            # abrir home + buscar
+            sd.abrir_home_sciencedirect(driver, URL_SD, config.DOWNLOAD_DIR_SCIENCEDIRECT)
+            sd.buscar_en_sciencedirect(driver, query, config.DOWNLOAD_DIR_SCIENCEDIRECT)
+
+            # forzar 100 por página: si el módulo lo trae, úsalo; si no, fallback local
+            if hasattr(sd, "fijar_resultados_por_pagina"):
+                sd.fijar_resultados_por_pagina(driver, per_page=sd_per_page, carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT)
+            else:
+                _sd_set_per_page_manual(driver, per_page=sd_per_page)
+
+            # paginar y descargar
+            if hasattr(sd, "descargar_varias_paginas_sd"):
+                sd.descargar_varias_paginas_sd(
                     driver,
                     carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT,
                     consulta_slug=query.replace(" ", "-"),
-                    etiqueta=f"p{i}"
+                    paginas=paginas_sd,
+                    etiqueta_prefijo="p"
                 )
-                if i < paginas_sd:
-                    if not _sd_next(driver):
-                        print("ℹ SD: no hay más páginas.")
-                        break
-
-    finally:
-        driver.quit()
+            else:
+                # Fallback: descargar página actual + next x (paginas_sd-1)
+                for i in range(1, paginas_sd + 1):
+                    _sd_export_ris_pagina(
+                        driver,
+                        carpeta_descargas=config.DOWNLOAD_DIR_SCIENCEDIRECT,
+                        consulta_slug=query.replace(" ", "-"),
+                        etiqueta=f"p{i}"
+                    )
+                    if i < paginas_sd:
+                        if not _sd_next(driver):
+                            print("ℹ SD: no hay más páginas.")
+                            break
+
+        finally:
+            driver.quit()
 
     # -------- Unificación --------
     print("\n📥 Leyendo y unificando descargas SAGE + ScienceDirect ...")
@@ -326,5 +362,6 @@ if __name__ == "__main__":
         query='generative artificial intelligence',
         paginas_sage=5,   # SAGE: páginas
         paginas_sd=5,     # ScienceDirect: páginas
-        sd_per_page=100   # SD: resultados por página (25/50/100)
+        sd_per_page=100,  # SD: resultados por página (25/50/100)
+        sd_workers=1      # SD: navegadores en paralelo (>1 = un login SSO por navegador)
     )
@@ -1,5 +1,5 @@
 # main_sciencedirect.py
-from utils.browser import crear_navegador, cerrar_banners
+from utils.browser import crear_navegador, cerrar_banners, bloquear_recursos
 from utils.sso_google import login_con_google
 from utils.sciencedirect import (
     abrir_home_sciencedirect,
@@ -25,6 +25,9 @@ if __name__ == "__main__":
             dominio_objetivo=DOMINIO_OBJETIVO
         )
 
+        # 1b) Ya autenticados: dejar de bajar imágenes/fuentes/analítica (no antes: CAPTCHA/2FA)
+        bloquear_recursos(driver)
+
         # 2) Cerrar banners genéricos
         cerrar_banners(driver)
 
@@ -4,6 +4,7 @@
 # 1) Contar frecuencia de un conjunto de términos semilla en los abstracts.
 # 2) Descubrir hasta 15 nuevos términos (unigramas/bigramas) relevantes con TF-IDF.
 # 3) Evaluar la “precisión” de los nuevos términos mediante similitud semántica con embeddings.
+#    - Backend opcional ONNX/OpenVINO con SIM_ST_BACKEND (el mismo cargador de text_similarity).
 #    - Si no hay sentence-transformers, el análisis semántico queda como N/D y el flujo continúa.
 # 4) Guardar gráficos de barras simples (matplotlib) para visualización rápida.
 # -------------------------------------------------------------------------------------------------
@@ -11,18 +12,16 @@
 import os
 import re
 import math
+from functools import lru_cache
 from typing import List, Tuple, Dict
 
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 
-# Embeddings opcionales
-try:
-    from sentence_transformers import SentenceTransformer
-    _HAY_ST = True
-except Exception:
-    _HAY_ST = False
+# Embeddings opcionales: se comparte el cargador (y la caché de modelos) de text_similarity,
+# que elige backend torch/onnx/openvino por la variable de entorno SIM_ST_BACKEND.
+from .text_similarity import _HAS_ST as _HAY_ST, _get_model
 
 # -----------------------
 # Normalización de texto
@@ -30,6 +29,12 @@ except Exception:
 
 _patron_palabra = re.compile(r"[A-Za-z][A-Za-z\-']+")
 
+@lru_cache(maxsize=4096)
+def _normalizar_str(texto: str) -> str:
+    # Cacheada: semillas y términos cortos se normalizan muchas veces con el mismo valor
+    tokens = [t.lower() for t in _patron_palabra.findall(texto)]
+    return " ".join(tokens)
+
 def normalizar(texto: str) -> str:
     """
     Convierte a minúsculas y conserva letras/apóstrofos/guiones.
@@ -37,8 +42,7 @@ def normalizar(texto: str) -> str:
     """
     if not isinstance(texto, str):
         texto = "" if texto is None else str(texto)
-    tokens = [t.lower() for t in _patron_palabra.findall(texto)]
-    return " ".join(tokens)
+    return _normalizar_str(texto)
 
 def asegurar_texto(serie: pd.Series) -> pd.Series:
     """Aplica normalización a una Serie que contiene abstracts."""
@@ -73,6 +77,24 @@ def semillas_categoria() -> List[str]:
     # las devolvemos ya normalizadas para hacer matching consistente
     return [normalizar(s) for s in semillas]
 
+# Patrones compilados por conjunto de semillas (evita recompilar en cada llamada)
+_SEED_PATTERNS_CACHE: Dict[Tuple[str, ...], List[re.Pattern]] = {}
+
+def _patrones_semillas(semillas_norm: List[str]) -> List[re.Pattern]:
+    """
+    Devuelve un regex compilado por semilla, con borde aproximado para evitar falsos
+    positivos (inicio/fin o espacio). Se compila una sola vez por conjunto de semillas.
+    """
+    clave = tuple(semillas_norm)
+    patrones = _SEED_PATTERNS_CACHE.get(clave)
+    if patrones is None:
+        patrones = [
+            re.compile(r"(?<![A-Za-z])" + re.escape(s) + r"(?![A-Za-z])")
+            for s in clave
+        ]
+        _SEED_PATTERNS_CACHE[clave] = patrones
+    return patrones
+
 def frecuencias_semillas(abstracts: List[str], semillas_norm: List[str]) -> pd.DataFrame:
     """
     Calcula cuántas veces aparece cada semilla en el corpus:
@@ -85,12 +107,9 @@ def frecuencias_semillas(abstracts: List[str], semillas_norm: List[str]) -> pd.D
     corpus_unido = "\n".join(abstracts_norm)
 
     filas = []
-    for termino in semillas_norm:
-        # Borde aproximado para evitar falsos positivos (inicio/fin o espacio)
-        patron = r"(?<![A-Za-z])" + re.escape(termino) + r"(?![A-Za-z])"
-
-        total = len(re.findall(patron, corpus_unido))
-        docs = sum(1 for t in abstracts_norm if re.search(patron, t))
+    for termino, patron in zip(semillas_norm, _patrones_semillas(semillas_norm)):
+        total = len(patron.findall(corpus_unido))
+        docs = sum(1 for t in abstracts_norm if patron.search(t))
 
         filas.append({
             "termino": termino,
@@ -147,15 +166,6 @@ def descubrir_nuevos_terminos(abstracts: List[str], max_terminos: int = 15) -> p
 # 3) Evaluación de precisión de nuevos términos (embeddings/coseno)
 # -------------------------------------------------------------------
 
-_modelos_cache = {}
-
-def _modelo(name: str):
-    if not _HAY_ST:
-        raise RuntimeError("No está instalada la librería 'sentence-transformers'.")
-    if name not in _modelos_cache:
-        _modelos_cache[name] = SentenceTransformer(name)
-    return _modelos_cache[name]
-
 def evaluar_precision_embeddings(
     nuevos_terminos: List[str],
     semillas_norm: List[str],
@@ -177,7 +187,7 @@ def evaluar_precision_embeddings(
             "precisa": ["N/D"] * len(nuevos_terminos),
         })
 
-    modelo = _modelo(nombre_modelo)
+    modelo = _get_model(nombre_modelo)
     vec_semillas = modelo.encode(semillas_norm, normalize_embeddings=True)
     centro = np.mean(vec_semillas, axis=0)
 
@@ -199,14 +209,16 @@ def guardar_barras(df: pd.DataFrame, col_x: str, col_y: str, titulo: str, ruta_s
     """
     Dibuja y guarda un gráfico de barras simple (sin estilos ni colores especiales).
     """
+    import matplotlib
+    matplotlib.use("Agg")  # backend sin ventana: solo exportamos a PNG
     import matplotlib.pyplot as plt
 
-    fig = plt.figure(figsize=(10, 5))
+    # constrained_layout ajusta márgenes al dibujar (sin recalcular con tight_layout)
+    fig = plt.figure(figsize=(10, 5), constrained_layout=True)
     ax = plt.gca()
     ax.bar(df[col_x], df[col_y])
     ax.set_title(titulo)
     ax.set_ylabel(col_y)
     ax.set_xticklabels(df[col_x], rotation=45, ha="right")
-    fig.tight_layout()
     fig.savefig(ruta_salida, dpi=160)
     plt.close(fig)
@@ -7,6 +7,21 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException
+
+# Sondeo de las esperas explícitas (Selenium usa 0.5 s por defecto)
+POLL_ESPERA = 0.1
+
+def esperar(driver, timeout):
+    """WebDriverWait común a todos los scrapers: sondea cada POLL_ESPERA segundos."""
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_ESPERA, ignored_exceptions=(NoSuchElementException,))
+
+# Recursos que el scraping nunca inspecciona: imágenes, fuentes y analítica
+_URLS_BLOQUEADAS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*", "*hotjar*", "*newrelic*",
+]
 
 def crear_navegador(ruta_driver, carpeta_descargas):
     """
@@ -34,6 +49,18 @@ def crear_navegador(ruta_driver, carpeta_descargas):
     # Antes: service = Service(ruta_driver); webdriver.Chrome(service=service, options=opciones)
     return webdriver.Chrome(options=opciones)
 
+def bloquear_recursos(driver):
+    """
+    Deja de descargar imágenes, fuentes y analítica (CDP Network.setBlockedURLs).
+    Llamar DESPUÉS del login SSO: un CAPTCHA/2FA de Google necesita ver sus imágenes.
+    El CSS se conserva: sin él cambian las reglas de visibilidad/clic.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _URLS_BLOQUEADAS})
+    except Exception:
+        pass
+
 def cerrar_banners(driver):
     posibles = [
         (By.CSS_SELECTOR, 'button#onetrust-accept-btn-handler'),
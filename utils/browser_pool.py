@@ -0,0 +1,70 @@
+# utils/browser_pool.py
+import queue
+from contextlib import contextmanager
+
+class BrowserPool:
+    """
+    Pool de navegadores Selenium precalentados.
+    Arrancar Chrome cuesta varios segundos: los drivers se crean (y opcionalmente
+    se autentican) una sola vez y se prestan con acquire(); al devolverlos se
+    dejan en about:blank en vez de cerrarlos, conservando la sesión CRAI/SSO.
+
+        pool = BrowserPool(2, lambda i: crear_navegador(None, carpeta_i), preparar=login)
+        with pool.acquire() as drv:
+            abrir_home_sciencedirect(drv, url, carpeta)
+    """
+
+    def __init__(self, size, factory, preparar=None):
+        """
+        size: número de drivers a mantener.
+        factory(i): crea el i-ésimo driver (i = 0..size-1).
+        preparar(driver): opcional, se llama una vez por driver (p. ej. login SSO).
+        """
+        if size < 1:
+            raise ValueError("size debe ser >= 1")
+        self.size = size
+        self._libres = queue.Queue(maxsize=size)
+        self._todos = []
+        try:
+            for i in range(size):
+                driver = factory(i)
+                self._todos.append(driver)
+                if preparar is not None:
+                    preparar(driver)
+                self._libres.put(driver)
+        except Exception:
+            self.close()
+            raise
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Presta un driver libre (bloquea hasta `timeout` segundos si no hay ninguno)."""
+        driver = self._libres.get(timeout=timeout)
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def _release(self, driver):
+        # about:blank corta descargas/JS pendientes de la página anterior sin perder cookies
+        try:
+            driver.get("about:blank")
+        except Exception:
+            pass
+        self._libres.put(driver)
+
+    def close(self):
+        """Cierra todos los drivers del pool."""
+        for driver in self._todos:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._todos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -30,9 +30,14 @@ from sklearn.preprocessing import normalize
 from scipy.cluster.hierarchy import linkage, dendrogram, fcluster, cophenet
 from scipy.spatial.distance import squareform
 
-# Visualización
+# Visualización (backend Agg: exportación por lotes a PNG, sin ventana interactiva)
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+# Simplifica trazos casi colineales (menos datos vectoriales en dendrogramas grandes)
+plt.rcParams["path.simplify_threshold"] = 1.0
+
 
 # ---------------------------
 # 0) Cargar datos del CSV
@@ -150,24 +155,31 @@ def clustering_jerarquico(
 # ---------------------------------------------------------
 # 4) Dibujar dendrogramas y guardar como imágenes (PNG)
 # ---------------------------------------------------------
-def guardar_dendrograma(Z, etiquetas: List[str], ruta_png: str, titulo: str):
+def guardar_dendrograma(Z, etiquetas: List[str], ruta_png: str, titulo: str, max_leaves: int = 50):
     """
     Genera y guarda el dendrograma.
     - Eje Y: "altura" de fusión (distancia)
     - Eje X: documentos (titulares abreviados)
+    - Solo se dibujan las últimas `max_leaves` fusiones (truncate_mode='lastp'):
+      el costo de render pasa de O(N) hojas a O(max_leaves). Las hojas que agrupan
+      varios documentos se rotulan con su conteo, p. ej. "(12)".
     """
-    plt.figure(figsize=(12, 6))
+    n_hojas = min(len(Z) + 1, max_leaves)
+    fig = plt.figure(figsize=(12, 6), constrained_layout=True)
     dendrogram(
         Z,
         labels=etiquetas,
+        truncate_mode="lastp",
+        p=max_leaves,
+        show_leaf_counts=True,
+        no_labels=n_hojas > 100,  # con demasiadas hojas los rótulos no se leen
         leaf_rotation=90,
         leaf_font_size=8,
         color_threshold=None,
     )
     plt.title(titulo)
-    plt.tight_layout()
-    plt.savefig(ruta_png, dpi=150)
-    plt.close()
+    fig.savefig(ruta_png, dpi=150)
+    plt.close(fig)
 
 
 # ---------------------------------------------------------
@@ -1,58 +1,140 @@
 # utils/ris_merge.py
-import os, re, unicodedata, json
+import os, re, sys, csv, gzip, unicodedata, json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import List, Dict, Tuple, Iterable
 import pandas as pd
 
+# orjson opcional: serializa JSON bastante más rápido (solo se usa en el export comprimido)
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
 # -------------------- utilidades --------------------
 
+# Regex precompilados (se usan por cada línea/registro; evita re-buscar en la caché de `re`)
+_RE_SPACES = re.compile(r"\s+")
+_RE_DOI_PREFIX = re.compile(r"(?i)^doi:\s*")
+_RE_DOI_URL = re.compile(r"(?i)^https?://(dx\.)?doi\.org/")
+_RE_NONALNUM = re.compile(r"[^a-z0-9]+")
+_RE_YEAR = re.compile(r"\d{4}")
+# Los TAG RIS son ASCII: se buscan directamente sobre bytes
+_RE_RIS_TAG = re.compile(rb"^([A-Z0-9]{2})\s*-\s*(.*)$")
+# Para detectar formato sobre un bloque: [^\S\r\n] = espacio que no cruza de línea.
+# El inicio de línea se ancla a mano: con re.M `^` solo sigue a \n y los archivos con
+# fin de línea CR (Mac clásico) quedarían con un único acierto; splitlines acepta \r, \n y \r\n.
+_RE_RIS_HEAD = re.compile(rb"(?:^|[\r\n])[A-Z0-9]{2}[^\S\r\n]*-[^\S\r\n]+")
+
 def _norm_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return _RE_SPACES.sub(" ", s).strip()
 
+# Los títulos/DOI se repiten entre fuentes (es justo lo que deduplicamos): memoizamos
+@lru_cache(maxsize=65536)
 def _norm_doi(raw: str) -> str:
     if not raw:
         return ""
     s = raw.strip().replace("\\", "/").replace(" ", "")
-    s = re.sub(r"(?i)^doi:\s*", "", s)
-    s = re.sub(r"(?i)^https?://(dx\.)?doi\.org/", "", s)
+    s = _RE_DOI_PREFIX.sub("", s)
+    s = _RE_DOI_URL.sub("", s)
     return s.strip().lower()
 
+@lru_cache(maxsize=None)
+def _combining_table() -> Dict[int, None]:
+    """Tabla para str.translate que elimina todos los caracteres combinantes (tildes, diéresis...)."""
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))}
+
+@lru_cache(maxsize=65536)
 def _canon_title(t: str) -> str:
     if not t:
         return ""
     s = t.strip().lower()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(c for c in s if not unicodedata.combining(c))
-    s = re.sub(r"[^a-z0-9]+", " ", s)
+    if not s.isascii():  # "quick check": en ASCII la NFKD no cambia nada
+        s = unicodedata.normalize("NFKD", s)
+        s = s.translate(_combining_table())
+    s = _RE_NONALNUM.sub(" ", s)
     return _norm_spaces(s)
 
 def _year_from_py(py: str) -> str:
     if not py:
         return ""
-    m = re.search(r"\d{4}", py)
+    m = _RE_YEAR.search(py)
     return m.group(0) if m else ""
 
-def _read_text(path: str) -> str:
+def _decode(b: bytes) -> str:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return b.decode("utf-8")
     except UnicodeDecodeError:
-        with open(path, "r", encoding="latin-1") as f:
-            return f.read()
+        return b.decode("latin-1")
 
-def _looks_like_ris(txt: str) -> bool:
-    # Heurística simple: debe haber varias líneas con TAG "XX  - "
-    lines = txt.splitlines()
-    hits = 0
-    for ln in lines[:200]:  # revisa primeras 200 líneas
-        if re.match(r"^[A-Z0-9]{2}\s*-\s+", ln):
-            hits += 1
-        if hits >= 3:
-            return True
-    return False
+_HEAD_BYTES = 8192  # para reconocer el formato basta el inicio del archivo
+
+def _looks_like_ris(head: bytes) -> bool:
+    # Heurística simple: debe haber varias líneas con TAG "XX  - " (un solo escaneo en C)
+    return len(_RE_RIS_HEAD.findall(head[:_HEAD_BYTES])) >= 3
 
 # -------------------- PARSEADOR RIS --------------------
 
-def parse_ris_text(txt: str, source_db: str, source_file: str) -> List[Dict]:
+# Manejadores por TAG: (registro_actual, valor, autores, keywords) -> None.
+# TY/ER no están aquí porque abren/cierran el registro en parse_ris_text.
+
+def _h_title(cur, val, authors, keywords):
+    cur["title"] = _norm_spaces(val); cur["ti"] = cur["title"]
+
+def _h_journal(cur, val, authors, keywords):
+    cur["journal"] = _norm_spaces(val)
+
+def _h_author(cur, val, authors, keywords):
+    if val.strip(): authors.append(_norm_spaces(val))
+
+def _h_year(cur, val, authors, keywords):
+    cur["year"] = _year_from_py(val); cur["date"] = val.strip()
+
+def _h_abstract(cur, val, authors, keywords):
+    cur["abstract"] = max([cur.get("abstract", ""), _norm_spaces(val)], key=len)
+
+def _h_keyword(cur, val, authors, keywords):
+    if val.strip(): keywords.append(val)
+
+def _h_doi(cur, val, authors, keywords):
+    cur["doi"] = _norm_doi(val)
+
+def _h_url(cur, val, authors, keywords):
+    cur["url"] = val.strip()
+
+def _h_field(name):
+    def _h(cur, val, authors, keywords):
+        cur[name] = _norm_spaces(val)
+    return _h
+
+# TAG -> manejador: una sola búsqueda en dict por línea en vez de una cadena de elif
+_TAG_HANDLERS = {
+    b"T1": _h_title, b"TI": _h_title,
+    b"T2": _h_journal, b"JF": _h_journal, b"JO": _h_journal,
+    b"AU": _h_author,
+    b"PY": _h_year, b"Y1": _h_year,
+    b"DA": _h_field("date"),
+    b"AB": _h_abstract, b"N2": _h_abstract,
+    b"KW": _h_keyword,
+    b"DO": _h_doi,
+    b"UR": _h_url,
+    b"SN": _h_field("issn"),
+    b"VL": _h_field("volume"),
+    b"IS": _h_field("issue"),
+    b"SP": _h_field("page_start"),
+    b"EP": _h_field("page_end"),
+}
+
+def parse_ris_text(txt, source_db: str, source_file: str) -> List[Dict]:
+    """
+    txt: contenido RIS como bytes (lo que entrega parse_ris_file) o str.
+    Los TAG se comparan como bytes; solo el valor de cada línea se decodifica
+    (UTF-8 y, si falla, latin-1).
+    """
+    if isinstance(txt, str):
+        txt = txt.encode("utf-8")
     lines = txt.splitlines()
     recs = []
     cur = {}
@@ -67,87 +149,137 @@ def parse_ris_text(txt: str, source_db: str, source_file: str) -> List[Dict]:
         if keywords:
             cur["keywords"] = list(dict.fromkeys([_norm_spaces(k) for k in keywords if k.strip()]))
         cur["doi_norm"] = _norm_doi(cur.get("doi", ""))
-        title_main = cur.get("title", "") or cur.get("ti", "")
-        cur["title_canon"] = _canon_title(title_main)
+        # El título canónico solo se usa como clave cuando no hay DOI: evitamos calcularlo
+        if cur["doi_norm"]:
+            cur["title_canon"] = ""
+        else:
+            cur["title_canon"] = _canon_title(cur.get("title", "") or cur.get("ti", ""))
         cur.setdefault("sources", []).append(source_db)
         cur.setdefault("source_files", []).append(source_file)
-        recs.append(cur.copy())
+        # Sin copia: TY/ER siempre reasignan `cur` a un dict nuevo tras el flush
+        recs.append(cur)
+
+    get_handler = _TAG_HANDLERS.get
+    decode = _decode
+    match_tag = _RE_RIS_TAG.match  # referencias locales dentro del bucle caliente
 
     for raw in lines:
-        m = re.match(r"^([A-Z0-9]{2})\s*-\s*(.*)$", raw)
-        if not m:
-            continue
-        tag, val = m.group(1), (m.group(2) or "").rstrip()
+        if raw[2:6] == b"  - ":
+            # Formato canónico "XX  - valor": basta con cortar la cadena
+            tag, val = raw[:2], decode(raw[6:]).strip()
+        else:
+            # Espaciado irregular ("TY -JOUR", "ER  -"): recurrimos al regex
+            m = match_tag(raw)
+            if not m:
+                continue
+            tag, val = m.group(1), decode(m.group(2) or b"").rstrip()
 
-        if tag == "TY":
+        if tag == b"TY":
             if cur:
                 _flush()
             cur = {"ty": val}
             authors = []
             keywords = []
-        elif tag == "ER":
+        elif tag == b"ER":
             _flush()
             cur = {}
             authors = []
             keywords = []
-        elif tag in ("T1", "TI"):
-            cur["title"] = _norm_spaces(val); cur["ti"] = cur["title"]
-        elif tag in ("T2", "JF", "JO"):
-            cur["journal"] = _norm_spaces(val)
-        elif tag == "AU":
-            if val.strip(): authors.append(_norm_spaces(val))
-        elif tag in ("PY", "Y1"):
-            cur["year"] = _year_from_py(val); cur["date"] = val.strip()
-        elif tag == "DA":
-            cur["date"] = _norm_spaces(val)
-        elif tag in ("AB", "N2"):
-            cur["abstract"] = max([cur.get("abstract", ""), _norm_spaces(val)], key=len)
-        elif tag == "KW":
-            if val.strip(): keywords.append(val)
-        elif tag == "DO":
-            cur["doi"] = _norm_doi(val)
-        elif tag == "UR":
-            cur["url"] = val.strip()
-        elif tag == "SN":
-            cur["issn"] = _norm_spaces(val)
-        elif tag == "VL":
-            cur["volume"] = _norm_spaces(val)
-        elif tag == "IS":
-            cur["issue"] = _norm_spaces(val)
-        elif tag == "SP":
-            cur["page_start"] = _norm_spaces(val)
-        elif tag == "EP":
-            cur["page_end"] = _norm_spaces(val)
+        else:
+            h = get_handler(tag)
+            if h is not None:
+                h(cur, val, authors, keywords)
 
     return recs
 
 def parse_ris_file(path: str, source_db: str = "") -> List[Dict]:
-    txt = _read_text(path)
-    if not _looks_like_ris(txt):
-        return []
-    return parse_ris_text(txt, source_db=source_db or "unknown", source_file=path)
+    # Se lee solo la cabecera para descartar archivos que no son RIS; si lo es,
+    # se completa la lectura (una vez) y se parsea como bytes.
+    with open(path, "rb") as f:
+        head = f.read(_HEAD_BYTES)
+        if not _looks_like_ris(head):
+            return []
+        data = head + f.read()
+    return parse_ris_text(data, source_db=source_db or "unknown", source_file=path)
 
 # -------------------- DISCOVERY --------------------
 
 def _iter_candidate_files(folder: str, exts: Iterable[str]) -> Iterable[str]:
+    # os.scandir entrega el tipo de cada entrada sin un stat extra por archivo.
+    # Mismo orden que os.walk (top-down): archivos de la carpeta y luego subcarpetas.
     exts_l = tuple(e.lower() for e in exts)
-    for root, _, files in os.walk(folder):
-        for fn in files:
-            if fn.lower().endswith(exts_l):
-                yield os.path.join(root, fn)
-
-def load_ris_from_dirs(dirs: List[Tuple[str, str]], exts: Iterable[str]=(".ris",".RIS",".txt",".TXT"), verbose: bool=True) -> List[Dict]:
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for e in entries:
+            if e.is_dir():
+                if not e.is_symlink():  # como os.walk: no seguimos enlaces a carpetas
+                    subdirs.append(e.path)
+            elif e.name.lower().endswith(exts_l):
+                yield e.path
+        stack.extend(reversed(subdirs))
+
+def _parse_ris_file_safe(args: Tuple[str, str]) -> Tuple[List[Dict], str]:
+    # Nivel de módulo para poder enviarse a los procesos del pool; el error viaja como texto
+    path, source_db = args
+    try:
+        return parse_ris_file(path, source_db=source_db), ""
+    except Exception as e:
+        return [], str(e)
+
+# Por debajo de este volumen el parseo en serie gana: arrancar el pool (spawn en Windows,
+# cada proceso re-importa pandas) cuesta más que parsear unas pocas exportaciones de página.
+_POOL_MIN_FILES = 2
+_POOL_MIN_BYTES = 32 * 1024 * 1024
+
+def _total_bytes(paths: List[str]) -> int:
+    total = 0
+    for p in paths:
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+def load_ris_from_dirs(dirs: List[Tuple[str, str]], exts: Iterable[str]=(".ris",".RIS",".txt",".TXT"), verbose: bool=True, max_workers: int=None) -> List[Dict]:
     """
     dirs: lista de (ruta_carpeta, etiqueta_source_db)
+    max_workers: procesos para parsear archivos en paralelo (None = núcleos disponibles).
+    Todas las carpetas comparten un único pool, y solo si hay volumen suficiente.
     """
-    out = []
+    # 1) candidatos de todas las carpetas (None = carpeta inválida)
+    carpetas = []
+    tareas = []
     for folder, source in dirs:
         if not folder or not os.path.isdir(folder):
+            carpetas.append((folder, source, None))
+            continue
+        cand = list(_iter_candidate_files(folder, exts))
+        carpetas.append((folder, source, cand))
+        tareas.extend((p, source) for p in cand)
+
+    # 2) parseo: un solo pool para todos los archivos; cada archivo ya es una tarea gruesa
+    if len(tareas) >= _POOL_MIN_FILES and _total_bytes([p for p, _ in tareas]) >= _POOL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            resultados = list(ex.map(_parse_ris_file_safe, tareas, chunksize=1))
+    else:
+        resultados = [_parse_ris_file_safe(t) for t in tareas]
+
+    # 3) resultados en el orden de las carpetas (mismos mensajes que antes)
+    out = []
+    i = 0
+    for folder, source, cand in carpetas:
+        if cand is None:
             if verbose:
                 print(f"⚠️ Carpeta no existe o no es válida: {folder}")
             continue
 
-        cand = list(_iter_candidate_files(folder, exts))
         if verbose:
             print(f"📂 {source:<13} -> {folder}")
             print(f"   Archivos candidatos ({', '.join(exts)}): {len(cand)}")
@@ -156,11 +288,11 @@ def load_ris_from_dirs(dirs: List[Tuple[str, str]], exts: Iterable[str]=(".ris",
 
         count_before = len(out)
         for path in cand:
-            try:
-                recs = parse_ris_file(path, source_db=source)
-                out.extend(recs)
-            except Exception as e:
-                print(f"⚠️ Error parseando {path}: {e}")
+            recs, error = resultados[i]
+            i += 1
+            if error:
+                print(f"⚠️ Error parseando {path}: {error}")
+            out.extend(recs)
 
         if verbose:
             print(f"   Registros RIS válidos añadidos: {len(out)-count_before}")
@@ -176,19 +308,18 @@ def _prefer(a: str, b: str) -> str:
     return a if len(a) >= len(b) else b
 
 def _merge_lists(a: List[str], b: List[str]) -> List[str]:
-    merged, seen = [], set()
-    for item in (a or []) + (b or []):
+    # dict conserva el orden de inserción: primera aparición (sin distinguir mayúsculas) gana
+    merged = {}
+    for item in chain(a or (), b or ()):
         key = item.strip()
-        if key and key.lower() not in seen:
-            seen.add(key.lower()); merged.append(key)
-    return merged
+        if key:
+            merged.setdefault(key.lower(), key)
+    return list(merged.values())
 
 def merge_records(records: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
-    by_key, dups = {}, []
-
-    def key_for(r):
-        if r.get("doi_norm"): return ("doi", r["doi_norm"])
-        return ("title", r.get("title_canon", ""))
+    # Un índice por tipo de clave: las claves son los str (hash cacheado por CPython),
+    # sin tuplas (tipo, valor) por registro. `result` conserva el orden de aparición.
+    by_doi, by_title, result, dups = {}, {}, [], []
 
     def merge_two(dst: Dict, src: Dict):
         for k in ["title","journal","year","date","abstract","doi","url","issn","volume","issue","page_start","page_end"]:
@@ -198,20 +329,27 @@ def merge_records(records: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
         dst["sources"]     = _merge_lists(dst.get("sources", []), src.get("sources", []))
         dst["source_files"]= _merge_lists(dst.get("source_files", []), src.get("source_files", []))
         dst["doi_norm"]    = _norm_doi(dst.get("doi", "") or dst.get("doi_norm",""))
-        dst["title_canon"] = _canon_title(dst.get("title","")) or dst.get("title_canon","")
+        if not dst["doi_norm"]:
+            dst["title_canon"] = _canon_title(dst.get("title","")) or dst.get("title_canon","")
 
     for r in records:
-        k = key_for(r)
-        if not k[1]:
-            by_key[("row", id(r))] = r
+        # Clave de deduplicación: DOI normalizado y, si falta, título canónico
+        if r.get("doi_norm"):
+            key_type, key, index = "doi", r["doi_norm"], by_doi
+        elif r.get("title_canon"):
+            key_type, key, index = "title", r["title_canon"], by_title
+        else:
+            result.append(r)  # sin DOI ni título canónico: no se puede deduplicar
             continue
-        if k not in by_key:
-            by_key[k] = r
+
+        kept = index.get(key)
+        if kept is None:
+            index[key] = r
+            result.append(r)
         else:
-            kept = by_key[k]
             dups.append({
-                "dedupe_key_type": k[0],
-                "dedupe_key_value": k[1],
+                "dedupe_key_type": key_type,
+                "dedupe_key_value": key,
                 "kept_title": kept.get("title",""),
                 "kept_doi": kept.get("doi",""),
                 "kept_sources": "; ".join(kept.get("sources", [])),
@@ -222,53 +360,84 @@ def merge_records(records: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
             })
             merge_two(kept, r)
 
-    result = list(by_key.values())
-    def _year_num(x):
-        try: return int((x.get("year") or "0")[:4])
-        except: return 0
-    result.sort(key=lambda x: (-_year_num(x), x.get("title","").lower()))
+    # "year" siempre viene de _year_from_py (4 dígitos o vacío): basta isdecimal, sin try/except
+    def _sort_key(x):
+        y = (x.get("year") or "")[:4]
+        return (-int(y) if y.isdecimal() else 0, x.get("title","").lower())
+    result.sort(key=_sort_key)
     return result, dups
 
+# Columnas del CSV unificado (las de lista se exportan unidas con "; ")
+_COLUMNS = ("title", "authors", "year", "date", "journal", "doi", "url", "abstract", "keywords",
+            "issn", "volume", "issue", "page_start", "page_end", "sources", "source_files")
+_LIST_COLUMNS = frozenset(("authors", "keywords", "sources", "source_files"))
+
+def _row_values(r: Dict) -> List[str]:
+    return ["; ".join(r.get(c, [])) if c in _LIST_COLUMNS else r.get(c, "") for c in _COLUMNS]
+
 def records_to_dataframe(records: List[Dict]) -> pd.DataFrame:
-    rows = []
-    for r in records:
-        rows.append({
-            "title": r.get("title",""),
-            "authors": "; ".join(r.get("authors", [])),
-            "year": r.get("year",""),
-            "date": r.get("date",""),
-            "journal": r.get("journal",""),
-            "doi": r.get("doi",""),
-            "url": r.get("url",""),
-            "abstract": r.get("abstract",""),
-            "keywords": "; ".join(r.get("keywords", [])),
-            "issn": r.get("issn",""),
-            "volume": r.get("volume",""),
-            "issue": r.get("issue",""),
-            "page_start": r.get("page_start",""),
-            "page_end": r.get("page_end",""),
-            "sources": "; ".join(r.get("sources", [])),
-            "source_files": "; ".join(r.get("source_files", [])),
-        })
-    return pd.DataFrame(rows)
+    # Llenamos listas por columna en una sola pasada (sin una lista intermedia de dicts por fila)
+    n = len(records)
+    cols = [[None] * n for _ in _COLUMNS]
+    for i, r in enumerate(records):
+        for col, val in zip(cols, _row_values(r)):
+            col[i] = val
+    return pd.DataFrame(dict(zip(_COLUMNS, cols)), copy=False)
 
 def duplicates_to_dataframe(dups: List[Dict]) -> pd.DataFrame:
     return pd.DataFrame(dups)
 
-def export_outputs(unified: List[Dict], duplicates: List[Dict], out_dir: str, base_name: str="unificado"):
+_GZIP_LEVEL = 1  # casi a velocidad de memoria y aun así reduce mucho el tamaño
+
+def _write_csv(path: str, records: List[Dict], compress: bool = False):
+    # Fila a fila con csv.writer: no se materializa el DataFrame completo solo para exportar.
+    # Mismo formato que DataFrame.to_csv (QUOTE_MINIMAL, fin de línea os.linesep).
+    if compress:
+        f = gzip.open(path, "wt", encoding="utf-8-sig", newline="", compresslevel=_GZIP_LEVEL)
+    else:
+        f = open(path, "w", encoding="utf-8-sig", newline="")
+    with f:
+        w = csv.writer(f, lineterminator=os.linesep)
+        w.writerow(_COLUMNS)
+        for r in records:
+            w.writerow(_row_values(r))
+
+_JSONL_BATCH = 4096
+
+def _write_jsonl(path: str, records: List[Dict], compress: bool = False):
+    # Un solo encoder reutilizado y escrituras por lotes (no un f.write por registro)
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    if compress:
+        dumps = orjson.dumps if _HAS_ORJSON else (lambda r: encode(r).encode("utf-8"))
+        with gzip.open(path, "wb", compresslevel=_GZIP_LEVEL) as f:
+            for i in range(0, len(records), _JSONL_BATCH):
+                batch = records[i:i + _JSONL_BATCH]
+                f.write(b"\n".join(map(dumps, batch)) + b"\n")
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(0, len(records), _JSONL_BATCH):
+            batch = records[i:i + _JSONL_BATCH]
+            f.write("\n".join(map(encode, batch)) + "\n")
+
+def export_outputs(unified: List[Dict], duplicates: List[Dict], out_dir: str, base_name: str="unificado", compress: bool=False):
+    """
+    compress=True escribe .csv.gz / .jsonl.gz (gzip nivel 1) para corpus grandes.
+    """
     os.makedirs(out_dir, exist_ok=True)
-    df_u = records_to_dataframe(unified)
     df_d = duplicates_to_dataframe(duplicates)
 
-    csv_u = os.path.join(out_dir, f"{base_name}.csv")
-    csv_d = os.path.join(out_dir, f"{base_name}_duplicados_eliminados.csv")
-    jsonl_u = os.path.join(out_dir, f"{base_name}.jsonl")
-
-    df_u.to_csv(csv_u, index=False, encoding="utf-8-sig")
-    df_d.to_csv(csv_d, index=False, encoding="utf-8-sig")
-    with open(jsonl_u, "w", encoding="utf-8") as f:
-        for r in unified:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    ext = ".gz" if compress else ""
+    csv_u = os.path.join(out_dir, f"{base_name}.csv{ext}")
+    csv_d = os.path.join(out_dir, f"{base_name}_duplicados_eliminados.csv{ext}")
+    jsonl_u = os.path.join(out_dir, f"{base_name}.jsonl{ext}")
+
+    _write_csv(csv_u, unified, compress=compress)
+    if compress:
+        df_d.to_csv(csv_d, index=False, encoding="utf-8-sig",
+                    compression={"method": "gzip", "compresslevel": _GZIP_LEVEL})
+    else:
+        df_d.to_csv(csv_d, index=False, encoding="utf-8-sig")
+    _write_jsonl(jsonl_u, unified, compress=compress)
 
     print(f"✅ Unificado deduplicado -> {csv_u}")
     print(f"✅ Duplicados eliminados -> {csv_d}")
@@ -5,12 +5,11 @@ import os, time
 from datetime import datetime
 from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
-    TimeoutException, NoSuchElementException, ElementClickInterceptedException
+    TimeoutException, ElementClickInterceptedException
 )
-from .browser import esperar_descarga_por_extension, renombrar_si_es_necesario
+from .browser import esperar, esperar_descarga_por_extension, renombrar_si_es_necesario
 
 # ---------------- utilidades ----------------
 
@@ -30,7 +29,7 @@ def _cerrar_banners_sage(driver):
     ]
     for how, what in candidatos:
         try:
-            WebDriverWait(driver, 3).until(EC.element_to_be_clickable((how, what))).click()
+            esperar(driver, 3).until(EC.element_to_be_clickable((how, what))).click()
             time.sleep(0.5)
             break
         except Exception:
@@ -42,32 +41,47 @@ def _scroll_center(driver, el):
     except Exception:
         pass
 
+# Limpieza agresiva del modal/backdrop. Con `soloSiOculto` no toca nada si el modal está
+# visible y devuelve true (para cerrarlo primero con su botón Close).
+_JS_LIMPIAR_MODAL = """
+    const soloSiOculto = arguments[0];
+    const modal = document.querySelector('#exportCitation');
+    // el modal de Bootstrap es position:fixed (offsetParent siempre null): se mira display y cajas
+    const visible = !!modal && getComputedStyle(modal).display !== 'none' && modal.getClientRects().length > 0;
+    if (visible && soloSiOculto) return true;
+    if (modal) {
+        modal.style.display = 'none';
+        modal.classList.remove('show');
+    }
+    document.querySelectorAll('.modal-backdrop').forEach(b => b.remove());
+    document.body.classList.remove('modal-open');
+    document.body.style.overflow = '';
+    return visible;
+"""
+
 def _ensure_no_modal(driver):
     """
     Cierra/oculta el modal de export y elimina cualquier 'modal-backdrop' residual
     que pueda bloquear la interacción con la paginación.
     """
-    # intentar cerrar con el botón Close si está visible
+    # Caso común (sin modal): una sola llamada JS limpia backdrops y evita las esperas
+    # de _cerrar_modal_export. Si hay modal visible, se cierra con Close y luego se limpia.
     try:
-        _cerrar_modal_export(driver, timeout=2)
+        if driver.execute_script(_JS_LIMPIAR_MODAL, True):
+            try:
+                _cerrar_modal_export(driver, timeout=2)
+            except Exception:
+                pass
+            driver.execute_script(_JS_LIMPIAR_MODAL, False)
     except Exception:
         pass
 
-    # limpieza agresiva con JS
     try:
-        driver.execute_script("""
-            const modal = document.querySelector('#exportCitation');
-            if (modal) {
-                modal.style.display = 'none';
-                modal.classList.remove('show');
-            }
-            document.querySelectorAll('.modal-backdrop').forEach(b => b.remove());
-            document.body.classList.remove('modal-open');
-            document.body.style.overflow = '';
-        """)
+        esperar(driver, 2).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
     except Exception:
         pass
-    time.sleep(0.2)
 
 def _lista_resultados_cargada(d):
     """Heurística simple: hay resultados listados (sin depender de selectores frágiles)."""
@@ -90,7 +104,7 @@ def buscar_en_sage(driver, query, carpeta_descargas):
     _cerrar_banners_sage(driver)
 
     # 1) Contenedor de búsqueda presente
-    WebDriverWait(driver, 15).until(
+    esperar(driver, 15).until(
         EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="search"][aria-label*="Search Sage Journals"]'))
     )
 
@@ -104,7 +118,7 @@ def buscar_en_sage(driver, query, carpeta_descargas):
     textbox = None
     for how, what in input_selectores:
         try:
-            textbox = WebDriverWait(driver, 8).until(EC.element_to_be_clickable((how, what)))
+            textbox = esperar(driver, 8).until(EC.element_to_be_clickable((how, what)))
             break
         except Exception:
             continue
@@ -125,11 +139,14 @@ def buscar_en_sage(driver, query, carpeta_descargas):
         textbox.submit()
 
     # 5) Esperar resultados (/action/doSearch o /search)
-    WebDriverWait(driver, 20).until(
+    esperar(driver, 20).until(
         lambda d: ("/action/doSearch" in d.current_url) or ("/search" in d.current_url)
     )
 
-    time.sleep(1)
+    try:
+        esperar(driver, 10).until(_lista_resultados_cargada)
+    except TimeoutException:
+        pass
     _guardar(driver, carpeta_descargas, "06_sage_resultados.png")
     print("✅ Búsqueda enviada en SAGE. URL resultados:", driver.current_url)
     return True
@@ -150,7 +167,7 @@ def _export_habilitado(d):
 def _cerrar_modal_export(driver, timeout=10):
     """Cierra el modal #exportCitation con el botón 'Close'."""
     try:
-        modal = WebDriverWait(driver, timeout).until(
+        modal = esperar(driver, timeout).until(
             EC.visibility_of_element_located((By.CSS_SELECTOR, '#exportCitation'))
         )
     except TimeoutException:
@@ -163,8 +180,8 @@ def _cerrar_modal_export(driver, timeout=10):
     ]
     for how, what in candidatos:
         try:
-            WebDriverWait(driver, 5).until(EC.element_to_be_clickable((how, what))).click()
-            WebDriverWait(driver, timeout).until(
+            esperar(driver, 5).until(EC.element_to_be_clickable((how, what))).click()
+            esperar(driver, timeout).until(
                 EC.invisibility_of_element_located((By.CSS_SELECTOR, '#exportCitation'))
             )
             return True
@@ -174,6 +191,16 @@ def _cerrar_modal_export(driver, timeout=10):
 
 # ---------------- paginación robusta ----------------
 
+# Un solo CSS con todas las variantes conocidas (1 round-trip) y XPath solo como respaldo.
+# Los XPath van por separado y en orden: una unión `|` devuelve en orden de documento y el
+# patrón laxo (span con "next") podría casar antes con el título de un resultado.
+_CANDIDATOS_SIGUIENTE = (
+    (By.CSS_SELECTOR, 'a.pagination__link.next, li.pagination-link.next-link > a.anchor'),
+    (By.XPATH, '//a[contains(@class,"pagination__link") and contains(@class,"next")]'),
+    (By.XPATH, '//a[contains(@data-aa-name,"next") or .//span[contains(., "next")]]'),
+)
+_selector_siguiente = None  # último selector que encontró 'Siguiente'
+
 def _ir_a_siguiente_pagina(driver):
     """
     Click robusto en 'Siguiente':
@@ -181,22 +208,22 @@ def _ir_a_siguiente_pagina(driver):
       - intenta click normal / JS
       - fallback: navegar a href (absoluto)
     """
+    global _selector_siguiente
     _ensure_no_modal(driver)
 
+    # El selector que funcionó en una página anterior se prueba primero (sin re-sondear)
+    candidatos = list(_CANDIDATOS_SIGUIENTE)
+    if _selector_siguiente in candidatos:
+        candidatos.remove(_selector_siguiente)
+        candidatos.insert(0, _selector_siguiente)
+
     next_anchor = None
-    candidatos = [
-        (By.CSS_SELECTOR, 'a.next.hvr-forward.pagination__link'),
-        (By.CSS_SELECTOR, 'a.pagination__link.next'),
-        (By.CSS_SELECTOR, 'li.pagination-link.next-link > a.anchor'),
-        (By.XPATH, '//a[contains(@class,"pagination__link") and contains(@class,"next")]'),
-        (By.XPATH, '//a[contains(@data-aa-name,"next") or .//span[contains(., "next")]]'),
-    ]
     for how, what in candidatos:
-        try:
-            next_anchor = driver.find_element(how, what)
+        encontrados = driver.find_elements(how, what)  # sin excepción si no hay match
+        if encontrados:
+            next_anchor = encontrados[0]
+            _selector_siguiente = (how, what)
             break
-        except NoSuchElementException:
-            continue
 
     if not next_anchor:
         return False
@@ -215,7 +242,7 @@ def _ir_a_siguiente_pagina(driver):
 
     _scroll_center(driver, next_anchor)
     try:
-        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, '.')))
+        esperar(driver, 5).until(EC.element_to_be_clickable((By.XPATH, '.')))
         next_anchor.click()
     except Exception:
         try:
@@ -226,12 +253,18 @@ def _ir_a_siguiente_pagina(driver):
             else:
                 return False
 
-    # esperar cambio
+    # esperar cambio: primero que la página vieja se vaya (URL nueva o el ancla 'Siguiente'
+    # ya no pertenece al DOM). _lista_resultados_cargada sola ya es cierta en la página
+    # anterior y se volvería a exportar la misma página.
+    antigua = EC.staleness_of(next_anchor)
     try:
-        WebDriverWait(driver, 15).until(
-            lambda d: (d.current_url != href_before) or _lista_resultados_cargada(d)
+        esperar(driver, 15).until(
+            lambda d: (d.current_url != href_before) or antigua(d)
         )
-        time.sleep(0.6)
+        try:
+            esperar(driver, 10).until(_lista_resultados_cargada)
+        except TimeoutException:
+            pass
         _ensure_no_modal(driver)
         return True
     except TimeoutException:
@@ -251,16 +284,15 @@ def exportar_ris_pagina_actual(driver, carpeta_descargas, consulta_slug="generat
     _ensure_no_modal(driver)  # por si quedó algo de una operación previa
 
     # Select all
-    chk_all = WebDriverWait(driver, 10).until(
+    chk_all = esperar(driver, 10).until(
         EC.element_to_be_clickable((By.CSS_SELECTOR, '#action-bar-select-all'))
     )
     _scroll_center(driver, chk_all)
     if not chk_all.is_selected():
         chk_all.click()
-        time.sleep(0.3)
 
-    # Habilitar export
-    WebDriverWait(driver, 10).until(_export_habilitado)
+    # Habilitar export (la espera reemplaza la pausa fija tras el click)
+    esperar(driver, 10).until(_export_habilitado)
     export_link = driver.find_element(By.CSS_SELECTOR, 'a[data-id="srp-export-citations"]')
     try:
         export_link.click()
@@ -268,10 +300,9 @@ def exportar_ris_pagina_actual(driver, carpeta_descargas, consulta_slug="generat
         driver.execute_script("arguments[0].click();", export_link)
 
     # Modal visible
-    modal = WebDriverWait(driver, 10).until(
+    modal = esperar(driver, 10).until(
         EC.visibility_of_element_located((By.CSS_SELECTOR, '#exportCitation'))
     )
-    time.sleep(0.2)
 
     # (si hubiera un select de formato, forzamos RIS)
     try:
@@ -279,13 +310,12 @@ def exportar_ris_pagina_actual(driver, carpeta_descargas, consulta_slug="generat
         for opt in sel.find_elements(By.TAG_NAME, 'option'):
             if "RIS" in (opt.text or ""):
                 opt.click()
-                time.sleep(0.2)
                 break
     except Exception:
         pass
 
     # Descargar
-    btn_download = WebDriverWait(modal, 10).until(
+    btn_download = esperar(modal, 10).until(
         EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.download__btn'))
     )
     try:
@@ -327,7 +357,6 @@ def exportar_ris_paginando(driver, carpeta_descargas, consulta_slug="generative-
         if not pudo:
             print("ℹ️  No hay más páginas (o no se encontró 'Siguiente').")
             break
-        time.sleep(0.6)
 
     print(f"✅ Descargas completadas: {len(rutas)} archivo(s).")
     return rutas
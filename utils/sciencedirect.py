@@ -1,11 +1,13 @@
 # utils/sciencedirect.py
-import os, time
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlencode, urljoin
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
-from .browser import esperar_descarga_por_extension, renombrar_si_es_necesario
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, JavascriptException
+from .browser import crear_navegador, bloquear_recursos, esperar, esperar_descarga_por_extension, renombrar_si_es_necesario
+from .browser_pool import BrowserPool
 
 # ---------------- utilidades pequeñas ----------------
 
@@ -15,12 +17,30 @@ def _scroll_into_view(driver, elem):
     except Exception:
         pass
 
+# centra el elemento y dice si otro nodo (overlay, banner) lo tapa en su punto central
+_JS_SCROLL_Y_CUBIERTO = """
+const el = arguments[0];
+el.scrollIntoView({block: 'center'});
+const r = el.getBoundingClientRect();
+const e = document.elementFromPoint(r.x + r.width / 2, r.y + r.height / 2);
+return !!e && !el.contains(e);
+"""
+
 def _click(driver, how, what, timeout=12, use_js_fallback=False):
-    el = WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((how, what)))
-    _scroll_into_view(driver, el)
+    el = esperar(driver, timeout).until(EC.element_to_be_clickable((how, what)))
+    try:
+        cubierto = driver.execute_script(_JS_SCROLL_Y_CUBIERTO, el)
+    except Exception:
+        _scroll_into_view(driver, el)  # la comprobación falló: al menos centrar como antes
+        cubierto = False
+    # si ya sabemos que está tapado, directo al click JS sin pasar por la excepción de Selenium
+    if cubierto and use_js_fallback:
+        driver.execute_script("arguments[0].click();", el)
+        return el
     try:
         el.click()
     except ElementClickInterceptedException:
+        # el overlay pudo aparecer entre la comprobación y el click
         if use_js_fallback:
             driver.execute_script("arguments[0].click();", el)
         else:
@@ -28,12 +48,42 @@ def _click(driver, how, what, timeout=12, use_js_fallback=False):
     return el
 
 def _type(driver, how, what, text, timeout=12):
-    el = WebDriverWait(driver, timeout).until(EC.presence_of_element_located((how, what)))
+    el = esperar(driver, timeout).until(EC.presence_of_element_located((how, what)))
     _scroll_into_view(driver, el)
     el.clear()
     el.send_keys(text)
     return el
 
+# scriptId de Runtime.compileScript por (driver, fuente): los predicados se evalúan en cada
+# tick de espera y así Chrome no vuelve a parsear el JS. Tras navegar el id puede quedar
+# inválido; entonces se recompila una vez y, si CDP no está disponible, se usa execute_script.
+_SCRIPT_IDS = {}
+
+def _js(driver, fuente):
+    """Ejecuta un snippet sin argumentos (con `return`) reutilizando su compilación en Chrome."""
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return driver.execute_script(fuente)
+    clave = (id(driver), fuente)
+    for _ in range(2):
+        try:
+            sid = _SCRIPT_IDS.get(clave)
+            if sid is None:
+                r = driver.execute_cdp_cmd("Runtime.compileScript", {
+                    "expression": f"(function(){{{fuente}}})()",
+                    "sourceURL": "",
+                    "persistScript": True,
+                })
+                sid = _SCRIPT_IDS[clave] = r["scriptId"]
+            r = driver.execute_cdp_cmd("Runtime.runScript", {"scriptId": sid, "returnByValue": True})
+        except Exception:
+            _SCRIPT_IDS.pop(clave, None)
+            continue
+        if "exceptionDetails" in r:
+            # el script sí llegó a ejecutarse: no se reintenta (puede tener efectos, p. ej. clicks)
+            raise JavascriptException(r["exceptionDetails"].get("text", "error JS"))
+        return r.get("result", {}).get("value")
+    return driver.execute_script(fuente)
+
 def _guardar(driver, carpeta, nombre):
     try:
         os.makedirs(carpeta, exist_ok=True)
@@ -43,6 +93,19 @@ def _guardar(driver, carpeta, nombre):
 
 # ---------------- helpers específicos SD ----------------
 
+_JS_RESULTADOS_LISTOS = """
+return (!!document.querySelector('#select-all-results')
+        || !!document.querySelector('button[data-aa-button="srp-export-multi-expand"]'))
+    && !!document.querySelector('a.result-list-title-link, ol.search-results li, div.result-item-content');
+"""
+
+_JS_EXPORT_HABILITADO = """
+const b = document.querySelector('button[data-aa-button="srp-export-multi-expand"]');
+if (!b) return false;
+const aria = (b.getAttribute('aria-disabled') || '').toLowerCase();
+return aria === 'false' || (aria === '' && !b.hasAttribute('disabled'));
+"""
+
 def _esperar_resultados_listos(driver, timeout=20):
     """
     Heurística para saber que la SRP (Search Results Page) está lista:
@@ -50,104 +113,55 @@ def _esperar_resultados_listos(driver, timeout=20):
     - y hay al menos un contenedor de resultado
     """
     def listo(d):
+        # una sola consulta JS por tick en vez de tres find_elements
         try:
-            hay_select_all = bool(d.find_elements(By.CSS_SELECTOR, '#select-all-results'))
-            hay_export = bool(d.find_elements(By.CSS_SELECTOR, 'button[data-aa-button="srp-export-multi-expand"]'))
-            hay_items = bool(d.find_elements(By.CSS_SELECTOR, 'a.result-list-title-link, ol.search-results li, div.result-item-content'))
-            return (hay_select_all or hay_export) and hay_items
+            return _js(d, _JS_RESULTADOS_LISTOS)
         except Exception:
             return False
-    WebDriverWait(driver, timeout).until(listo)
+    esperar(driver, timeout).until(listo)
+
+# Un solo execute_script localiza input/label, hace click y devuelve el estado:
+# un round-trip WebDriver en vez de ~10 (find_element + get_attribute + click).
+_JS_SELECT_ALL = """
+window.scrollTo(0, 0);
+const q = (sels) => { for (const s of sels) { const e = document.querySelector(s); if (e) return e; } return null; };
+const inp = q(['#select-all-results', 'input.checkbox-input#select-all-results', 'input.checkbox-input[aria-label*="Select all"]']);
+const lbl = q(['label[for="select-all-results"]', 'label.checkbox-label[for="select-all-results"]']);
+if (!inp && !lbl) return {ok: false, checked: false};
+const marcado = () => !!inp && (inp.checked || (inp.getAttribute('aria-checked') || '').toLowerCase() === 'true');
+if (!marcado()) { try { (inp || lbl).scrollIntoView({block: 'center'}); (inp || lbl).click(); } catch (e) {} }
+if (!marcado() && lbl && inp) { try { lbl.click(); } catch (e) {} }
+if (!marcado() && inp) {
+    inp.checked = true;
+    inp.setAttribute('aria-checked', 'true');
+    inp.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return {ok: true, checked: marcado()};
+"""
+
+_JS_SELECT_ALL_MARCADO = """
+const i = document.querySelector('#select-all-results');
+return !!i && (i.checked || (i.getAttribute('aria-checked') || '').toLowerCase() === 'true');
+"""
 
 def _marcar_select_all_robusto(driver):
     """
-    Intenta marcar 'Select all articles':
+    Intenta marcar 'Select all articles' con un único execute_script:
       1) input#select-all-results
       2) label[for="select-all-results"]
-      3) JS click al input si el click normal falla
-    Valida con is_selected() o aria-checked=true.
+      3) forzar checked + evento change sobre el input
+    Valida con la property checked o aria-checked=true.
     """
-    # asegurarnos de estar arriba (a veces es sticky)
-    try:
-        driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(0.2)
-    except Exception:
-        pass
-
-    # localizar input
-    inp = None
-    for sel in ['#select-all-results', 'input.checkbox-input#select-all-results', 'input.checkbox-input[aria-label*="Select all"]']:
-        try:
-            inp = driver.find_element(By.CSS_SELECTOR, sel)
-            break
-        except NoSuchElementException:
-            continue
-
-    # localizar label
-    lbl = None
-    for sel in ['label[for="select-all-results"]', 'label.checkbox-label[for="select-all-results"]']:
-        try:
-            lbl = driver.find_element(By.CSS_SELECTOR, sel)
-            break
-        except NoSuchElementException:
-            continue
-
-    if not inp and not lbl:
+    estado = _js(driver, _JS_SELECT_ALL) or {}
+    if not estado.get("ok"):
         raise TimeoutException("No encontré el checkbox ni su label para 'Select all articles'.")
+    if estado.get("checked"):
+        return
 
-    # estrategia de clicks
-    def _checked():
-        try:
-            if inp:
-                # probar primero property checked
-                if getattr(inp, "is_selected", None):
-                    if inp.is_selected():
-                        return True
-                # si no refleja, mirar aria-checked
-                aria = (inp.get_attribute("aria-checked") or "").lower()
-                return aria == "true"
-            return False
-        except Exception:
-            return False
-
-    if not _checked():
-        try:
-            if inp:
-                _scroll_into_view(driver, inp)
-                try:
-                    inp.click()
-                except ElementClickInterceptedException:
-                    driver.execute_script("arguments[0].click();", inp)
-                time.sleep(0.25)
-        except Exception:
-            pass
-
-    if not _checked() and lbl:
-        try:
-            _scroll_into_view(driver, lbl)
-            try:
-                lbl.click()
-            except ElementClickInterceptedException:
-                driver.execute_script("arguments[0].click();", lbl)
-            time.sleep(0.25)
-        except Exception:
-            pass
-
-    # último intento: JS directo sobre el input
-    if not _checked() and inp:
-        try:
-            driver.execute_script("""
-                const el = arguments[0];
-                try { el.click(); } catch(e){}
-                el.checked = true;
-                el.setAttribute('aria-checked','true');
-                el.dispatchEvent(new Event('change', {bubbles:true}));
-            """, inp)
-            time.sleep(0.25)
-        except Exception:
-            pass
-
-    if not _checked():
+    # la UI puede reflejar el click con retraso: sondea el estado (una consulta JS por tick)
+    try:
+        esperar(driver, 3).until(lambda d: _js(d, _JS_SELECT_ALL_MARCADO))
+    except TimeoutException:
         raise TimeoutException("No pude marcar 'Select all articles' (no quedó seleccionado).")
 
 def _esperar_export_habilitado(driver, timeout=10):
@@ -156,13 +170,10 @@ def _esperar_export_habilitado(driver, timeout=10):
     """
     def habilitado(d):
         try:
-            b = d.find_element(By.CSS_SELECTOR, 'button[data-aa-button="srp-export-multi-expand"]')
-            aria = (b.get_attribute("aria-disabled") or "").lower()
-            disabled = b.get_attribute("disabled")
-            return (aria == "false") or (aria == "") and (disabled is None)
+            return _js(d, _JS_EXPORT_HABILITADO)
         except Exception:
             return False
-    WebDriverWait(driver, timeout).until(habilitado)
+    esperar(driver, timeout).until(habilitado)
 
 # --------------- paso SD-1: abrir home autenticada ---------------
 
@@ -181,7 +192,7 @@ def abrir_home_sciencedirect(driver, url, carpeta_descargas):
     visible = False
     for how, what in candidatos:
         try:
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((how, what)))
+            esperar(driver, 15).until(EC.presence_of_element_located((how, what)))
             visible = True
             break
         except Exception:
@@ -210,7 +221,6 @@ def buscar_en_sciencedirect(driver, query, carpeta_descargas):
 
     # 3) Esperar resultados listos
     _esperar_resultados_listos(driver, timeout=25)
-    time.sleep(0.4)
     _guardar(driver, carpeta_descargas, "sd_resultados.png")
     print("✅ Resultados de ScienceDirect cargados:", driver.current_url)
     return True
@@ -240,9 +250,8 @@ def exportar_ris_pagina_actual_sd(driver, carpeta_descargas, consulta_slug="gene
 
     # 3) Abrir Export
     _click(driver, By.CSS_SELECTOR, 'button[data-aa-button="srp-export-multi-expand"]', use_js_fallback=True)
-    time.sleep(0.3)
 
-    # 4) Elegir RIS
+    # 4) Elegir RIS (_click espera a que el botón sea clicable: sin pausa fija tras abrir Export)
     _click(driver, By.CSS_SELECTOR, 'button[data-aa-button="srp-export-multi-ris"]', use_js_fallback=True)
 
     # 5) Esperar .ris
@@ -253,3 +262,59 @@ def exportar_ris_pagina_actual_sd(driver, carpeta_descargas, consulta_slug="gene
 
     print(f"✅ SD {etiqueta}: descargado -> {final_path}")
     return final_path
+
+# --------------- varias páginas en paralelo (pool de drivers) ---------------
+
+def crear_pool_sciencedirect(size, carpeta_base, preparar=None):
+    """
+    Crea un BrowserPool de `size` Chrome, cada uno con su propia carpeta de descargas
+    (carpeta_base/worker_i): si compartieran carpeta, esperar_descarga_por_extension
+    podría recoger el .ris de otro driver.
+    preparar(driver) (p. ej. login SSO) corre antes de bloquear imágenes/fuentes.
+    Devuelve (pool, carpetas) con carpetas[id(driver)] -> carpeta de ese driver.
+    """
+    carpetas = {}
+
+    def factory(i):
+        carpeta = os.path.join(carpeta_base, f"worker_{i}")
+        driver = crear_navegador(None, carpeta)
+        carpetas[id(driver)] = carpeta
+        return driver
+
+    def _preparar(driver):
+        if preparar is not None:
+            preparar(driver)
+        bloquear_recursos(driver)
+
+    return BrowserPool(size, factory, preparar=_preparar), carpetas
+
+def url_resultados_sd(url_base, query, pagina=1, per_page=100):
+    """URL directa de la SRP para una página (show/offset), sin pasar por el buscador ni 'next'."""
+    text = f"\"{query}\"" if '"' not in query else query
+    params = urlencode({"qs": text, "show": per_page, "offset": (pagina - 1) * per_page})
+    return urljoin(url_base, "search") + "?" + params
+
+def exportar_paginas_en_paralelo(pool, carpetas, url_base, query, paginas=5, per_page=100,
+                                 consulta_slug=None):
+    """
+    Exporta el RIS de las páginas 1..paginas de una consulta repartiéndolas entre los
+    drivers del pool (ThreadPoolExecutor): cada driver abre directamente su página con
+    show=per_page&offset=..., así las páginas no dependen unas de otras.
+    Devuelve las rutas .ris en orden de página (None si alguna falló).
+    """
+    slug = consulta_slug or query.replace(" ", "-")
+
+    def run_page(pagina):
+        with pool.acquire() as driver:
+            carpeta = carpetas[id(driver)]
+            try:
+                driver.get(url_resultados_sd(url_base, query, pagina, per_page))
+                return exportar_ris_pagina_actual_sd(driver, carpeta, consulta_slug=slug, etiqueta=f"p{pagina}")
+            except Exception as e:
+                print(f"❌ SD p{pagina}: {e}")
+                _guardar(driver, carpeta, f"sd_error_p{pagina}.png")
+                return None
+
+    with ThreadPoolExecutor(max_workers=pool.size) as ex:
+        futures = [ex.submit(run_page, i) for i in range(1, paginas + 1)]
+        return [f.result() for f in futures]
@@ -9,19 +9,19 @@
 # "Usar Chrome sin una cuenta" si aparece.
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time, os
+from .browser import esperar
 
 # ------------------------ utilidades básicas ------------------------
 
 def _click(driver, how, what, timeout=10):
     """Hace clic cuando un elemento es clicable."""
-    WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((how, what))).click()
+    esperar(driver, timeout).until(EC.element_to_be_clickable((how, what))).click()
 
 def _type(driver, how, what, text, timeout=10):
     """Escribe texto en un input cuando está presente."""
-    elem = WebDriverWait(driver, timeout).until(EC.presence_of_element_located((how, what)))
+    elem = esperar(driver, timeout).until(EC.presence_of_element_located((how, what)))
     elem.clear()
     elem.send_keys(text)
 
@@ -42,7 +42,7 @@ def _intentar_cerrar_modal_perfil_chrome(driver):
     Devuelve True si lo cerró, False si no apareció o no pudo.
     """
     try:
-        boton_sin_cuenta = WebDriverWait(driver, 5).until(
+        boton_sin_cuenta = esperar(driver, 5).until(
             EC.element_to_be_clickable(
                 (
                     By.XPATH,
@@ -52,8 +52,13 @@ def _intentar_cerrar_modal_perfil_chrome(driver):
                 )
             )
         )
+        url_antes = driver.current_url
         boton_sin_cuenta.click()
-        time.sleep(1)
+        try:
+            # esperamos a que la página cambie en lugar de una pausa fija
+            esperar(driver, 5).until(lambda d: d.current_url != url_antes)
+        except Exception:
+            pass
         return True
     except Exception:
         return False
@@ -81,7 +86,7 @@ def login_con_google(driver, url_revista, correo_institucional, contrasena, carp
 
     # 3) ¿Aparece tu cuenta para seleccionarla?
     try:
-        cuenta_chip = WebDriverWait(driver, 5).until(
+        cuenta_chip = esperar(driver, 5).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, f'div[data-identifier="{correo_institucional}"]'))
         )
         cuenta_chip.click()
@@ -90,7 +95,10 @@ def login_con_google(driver, url_revista, correo_institucional, contrasena, carp
         # Si no, escribimos el correo manualmente
         _type(driver, By.ID, "identifierId", correo_institucional, timeout=15)
         _click(driver, By.ID, "identifierNext")
-        time.sleep(2)
+        try:
+            esperar(driver, 5).until(EC.presence_of_element_located((By.NAME, "Passwd")))
+        except Exception:
+            pass
         _guardar_captura(driver, carpeta_descargas, "03_correo_enviado")
 
     # 4) Contraseña
@@ -114,16 +122,15 @@ def login_con_google(driver, url_revista, correo_institucional, contrasena, carp
     ]:
         try:
             _click(driver, *posible, timeout=5)
-            time.sleep(1)
         except Exception:
             pass
 
     # 6) Esperar a volver a la revista/proxy (o a que salgas de accounts.google.com)
     try:
         if dominio_objetivo:
-            WebDriverWait(driver, 40).until(EC.url_contains(dominio_objetivo))
+            esperar(driver, 40).until(EC.url_contains(dominio_objetivo))
         else:
-            WebDriverWait(driver, 40).until_not(EC.url_contains("accounts.google.com"))
+            esperar(driver, 40).until_not(EC.url_contains("accounts.google.com"))
     except Exception:
         # Si hay 2FA/CAPTCHA, aquí se queda esperando a que lo completes manualmente.
         pass
@@ -6,10 +6,16 @@
 # ----------------------------------------------
 
 import math
+import os
 import re
+import threading
+from array import array
+from collections import OrderedDict
 from typing import List, Tuple
 from functools import lru_cache
 
+import numpy as np
+
 # Para Coseno TF-IDF
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -22,17 +28,41 @@ try:
 except Exception:
     _HAS_ST = False
 
+# Levenshtein en C (bit-paralelo) si está instalada rapidfuzz; si no, DP en Python.
+try:
+    from rapidfuzz.distance import Levenshtein as _RFLevenshtein
+    from rapidfuzz.process import cdist as _rf_cdist
+    _HAS_RF = True
+except Exception:
+    _HAS_RF = False
+
+# Hash de 64 bits de cada n-grama (xxh3 si está instalada xxhash; si no, hash() de Python)
+try:
+    from xxhash import xxh3_64_intdigest as _hash_ngram
+except Exception:
+    _hash_ngram = hash
+
 _word_re = re.compile(r"\w+", re.UNICODE)
 
 def _tokenize_words(text: str) -> List[str]:
-    """Tokeniza a palabras alfanuméricas en minúscula."""
-    return [t.lower() for t in _word_re.findall(text or "")]
+    """Tokeniza a palabras alfanuméricas en minúscula (lower una vez sobre todo el texto)."""
+    return _word_re.findall((text or "").lower())
 
 def _ngrams(words: List[str], n: int = 2) -> List[Tuple[str, ...]]:
     """Genera n-gramas contiguos de longitud n a partir de una lista de palabras."""
     if n <= 0:
         return []
-    return [tuple(words[i:i+n]) for i in range(0, max(0, len(words)-n+1))]
+    # zip de n vistas desplazadas: (w0,w1,..), (w1,w2,..), ... sin cortar una lista por índice
+    return list(zip(*(words[i:] for i in range(n))))
+
+@lru_cache(maxsize=4096)
+def _ngram_set(text: str, n: int) -> frozenset:
+    """
+    Conjunto (inmutable, cacheable) de n-gramas de un texto, guardados como enteros
+    de 64 bits (hash de "w1 w2 ..."): ocupan menos que tuplas de str y el conjunto
+    se compara igual. En comparaciones todos-contra-todos cada documento se tokeniza una sola vez.
+    """
+    return frozenset(_hash_ngram(" ".join(g)) for g in _ngrams(_tokenize_words(text), n))
 
 # -----------------------------
 # 1) Levenshtein → Similitud
@@ -53,85 +83,155 @@ def levenshtein_similarity(a: str, b: str) -> float:
         dist = max(len(a), len(b))
         return 1.0 - (dist / max(1, dist))
 
-    # DP iterativa O(len(a)*len(b))
-    la, lb = len(a), len(b)
-    dp = [[0]*(lb+1) for _ in range(la+1)]
+    if _HAS_RF:
+        # Misma fórmula (1 - dist/max(len)), calculada por rapidfuzz en C
+        return _RFLevenshtein.normalized_similarity(a, b)
 
-    for i in range(la+1):
-        dp[i][0] = i
-    for j in range(lb+1):
-        dp[0][j] = j
+    # DP iterativa O(len(a)*len(b)) en tiempo, pero O(min(len)) en memoria:
+    # la fila i solo depende de la fila i-1, así que guardamos dos filas (prev/curr).
+    if len(b) > len(a):
+        a, b = b, a  # la cadena corta es la dimensión interna
+    if a.isascii() and b.isascii():
+        a, b = a.encode("ascii"), b.encode("ascii")  # comparar ints es más barato que str
+    la, lb = len(a), len(b)
+    prev = array("i", range(lb+1))   # dp[0][j] = j
+    curr = array("i", [0]) * (lb+1)
 
     for i in range(1, la+1):
         ca = a[i-1]
+        curr[0] = i                  # dp[i][0] = i
         for j in range(1, lb+1):
-            cb = b[j-1]
-            cost_sub = 0 if ca == cb else 1
-            dp[i][j] = min(
-                dp[i-1][j] + 1,        # borrar
-                dp[i][j-1] + 1,        # insertar
-                dp[i-1][j-1] + cost_sub  # sustituir (0 si iguales)
+            cost_sub = 0 if ca == b[j-1] else 1
+            curr[j] = min(
+                prev[j] + 1,           # borrar
+                curr[j-1] + 1,         # insertar
+                prev[j-1] + cost_sub   # sustituir (0 si iguales)
             )
+        prev, curr = curr, prev
 
-    dist = dp[la][lb]
+    dist = prev[lb]
     denom = max(la, lb)
     return 1.0 - (dist / denom)
 
+def levenshtein_similarity_matrix(list_a: List[str], list_b: List[str]) -> np.ndarray:
+    """
+    Matriz [len(list_a) x len(list_b)] de similitud Levenshtein.
+    Con rapidfuzz usa cdist (C, sin GIL, en todos los núcleos); si no, par a par.
+    """
+    a = [t or "" for t in list_a]
+    b = [t or "" for t in list_b]
+    if _HAS_RF:
+        return _rf_cdist(a, b, scorer=_RFLevenshtein.normalized_similarity, dtype=np.float64, workers=-1)
+    return np.array([[levenshtein_similarity(x, y) for y in b] for x in a], dtype=np.float64)
+
 # -----------------------------
 # 2) Jaccard (n-gramas de palabras)
 # -----------------------------
-def jaccard_similarity(a: str, b: str, n: int = 2) -> float:
+def jaccard_similarity(a: str, b: str, n: int = 2, min_sim: float = 0.0) -> float:
     """
     Jaccard sobre conjuntos de n-gramas (por defecto, bigramas).
     J(A,B) = |A ∩ B| / |A ∪ B|
+    Cota superior: J ≤ min(|A|,|B|) / max(|A|,|B|). Si no alcanza `min_sim`
+    se devuelve 0.0 sin calcular la intersección.
     """
-    A = set(_ngrams(_tokenize_words(a), n))
-    B = set(_ngrams(_tokenize_words(b), n))
+    return _jaccard_sets(_ngram_set(a or "", n), _ngram_set(b or "", n), min_sim)
+
+def _jaccard_sets(A: frozenset, B: frozenset, min_sim: float = 0.0) -> float:
+    """Jaccard sobre conjuntos ya construidos (lo usan la función pública y la matriz)."""
     if not A and not B:
         return 1.0
-    inter = len(A & B)
-    union = len(A | B)
+    la, lb = len(A), len(B)
+    if min(la, lb) < min_sim * max(la, lb):
+        return 0.0
+    inter = len(A.intersection(B))
+    union = la + lb - inter  # |A ∪ B| sin construir el conjunto unión
     return inter / union if union else 0.0
 
 # -----------------------------
 # 3) Sørensen–Dice (n-gramas)
 # -----------------------------
-def dice_similarity(a: str, b: str, n: int = 2) -> float:
+def dice_similarity(a: str, b: str, n: int = 2, min_sim: float = 0.0) -> float:
     """
     Dice sobre n-gramas:
     Dice = 2|A ∩ B| / (|A| + |B|)
+    Cota superior: 2·min(|A|,|B|) / (|A| + |B|); por debajo de `min_sim` → 0.0.
     """
-    A = set(_ngrams(_tokenize_words(a), n))
-    B = set(_ngrams(_tokenize_words(b), n))
+    return _dice_sets(_ngram_set(a or "", n), _ngram_set(b or "", n), min_sim)
+
+def _dice_sets(A: frozenset, B: frozenset, min_sim: float = 0.0) -> float:
+    """Dice sobre conjuntos ya construidos (lo usan la función pública y la matriz)."""
     if not A and not B:
         return 1.0
-    num = 2 * len(A & B)
-    den = len(A) + len(B)
+    la, lb = len(A), len(B)
+    if 2 * min(la, lb) < min_sim * (la + lb):
+        return 0.0
+    num = 2 * len(A.intersection(B))
+    den = la + lb
     return num / den if den else 0.0
 
 # -----------------------------
 # 4) Coseno con TF-IDF
 # -----------------------------
-@lru_cache(maxsize=128)
-def _cosine_tfidf_pair(a: str, b: str) -> float:
+def _corpus_vectorizer() -> TfidfVectorizer:
+    """TF-IDF para ajustar sobre TODO el corpus (unigramas+bigramas, tf sublineal)."""
+    return TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+
+# Vectorizador ajustado con fit_tfidf_corpus(); None = no hay corpus cargado
+_TFIDF_CORPUS = None
+
+def fit_tfidf_corpus(texts: List[str]) -> None:
+    """
+    Ajusta el TF-IDF una sola vez sobre el corpus. A partir de aquí
+    cosine_tfidf_similarity(a, b) usa ese IDF (con N=2 documentos el IDF no aporta nada).
     """
-    Construye un TF-IDF para los dos textos y calcula coseno.
-    Se cachea por performance.
+    global _TFIDF_CORPUS
+    _TFIDF_CORPUS = _corpus_vectorizer().fit([t or "" for t in texts])
+
+def cosine_tfidf_matrix(texts: List[str], dense_output: bool = True):
     """
-    vect = TfidfVectorizer(ngram_range=(1, 2), min_df=1, max_df=1.0)  # unigrams+bigramas
-    X = vect.fit_transform([a or "", b or ""])
+    Similitud coseno TF-IDF de todos contra todos: un solo fit sobre el corpus
+    y un único producto disperso X · Xᵀ (en vez de un TfidfVectorizer por par).
+    """
+    X = _corpus_vectorizer().fit_transform([t or "" for t in texts])
+    return cosine_similarity(X, dense_output=dense_output)
+
+def cosine_tfidf_similarity(a: str, b: str) -> float:
+    """
+    Coseno TF-IDF entre dos textos.
+    - Con corpus cargado (fit_tfidf_corpus): transforma ambos con el IDF del corpus.
+    - Sin corpus: TF-IDF construido solo con los dos textos (comportamiento original).
+    """
+    docs = [a or "", b or ""]
+    if _TFIDF_CORPUS is not None:
+        X = _TFIDF_CORPUS.transform(docs)
+    else:
+        X = TfidfVectorizer(ngram_range=(1, 2), min_df=1, max_df=1.0).fit_transform(docs)  # unigrams+bigramas
     sim = cosine_similarity(X[0], X[1])[0, 0]
     # Coseno ya está en [0,1] si no hay negativos
     return float(sim)
 
-def cosine_tfidf_similarity(a: str, b: str) -> float:
-    return _cosine_tfidf_pair(a or "", b or "")
-
 # -----------------------------
 # 5-6) IA con Sentence Transformers
 # -----------------------------
 # Carga perezosa para no pagar tiempo de arranque si no se usa.
+# El lock evita que dos hilos carguen el mismo modelo a la vez en la primera llamada.
 _MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+# Backend de sentence-transformers (>= 3.2): "torch" (por defecto), "onnx" u "openvino".
+# Con "onnx" se carga por defecto el export int8 que publica el hub para CPU; si el modelo
+# no lo trae, se cae a PyTorch.
+_ST_BACKEND = os.environ.get("SIM_ST_BACKEND", "torch").lower()
+_ST_ONNX_FILE = os.environ.get("SIM_ST_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+
+def _load_model(name: str):
+    if _ST_BACKEND in ("onnx", "openvino"):
+        kwargs = {"file_name": _ST_ONNX_FILE} if _ST_BACKEND == "onnx" and _ST_ONNX_FILE else {}
+        try:
+            return SentenceTransformer(name, backend=_ST_BACKEND, model_kwargs=kwargs)
+        except Exception as e:
+            print(f"⚠ No se pudo cargar '{name}' con backend {_ST_BACKEND} ({e}); uso PyTorch.")
+    return SentenceTransformer(name)
 
 def _get_model(name: str):
     if not _HAS_ST:
@@ -139,9 +239,77 @@ def _get_model(name: str):
             "La librería 'sentence-transformers' no está instalada. "
             "Instala con: pip install sentence-transformers"
         )
-    if name not in _MODELS:
-        _MODELS[name] = SentenceTransformer(name)
-    return _MODELS[name]
+    model = _MODELS.get(name)
+    if model is None:
+        with _MODELS_LOCK:
+            model = _MODELS.get(name)
+            if model is None:
+                model = _load_model(name)
+                # primer encode dentro del lock: los demás hilos no pagan la inicialización perezosa
+                model.encode(["warmup"], show_progress_bar=False)
+                _MODELS[name] = model
+    return model
+
+# Embeddings ya calculados por (modelo, texto): los títulos/abstracts repetidos no se re-codifican.
+# LRU acotada (OrderedDict: el más usado al final) para no retener todos los textos del proceso.
+_EMB_CACHE_MAX = 20000
+_EMB_CACHE = OrderedDict()
+_EMB_CACHE_LOCK = threading.Lock()
+
+def clear_embedding_cache() -> None:
+    """Vacía la caché de embeddings (p. ej. entre corpus distintos)."""
+    with _EMB_CACHE_LOCK:
+        _EMB_CACHE.clear()
+
+def _encode(texts: List[str], model_name: str, batch_size: int = 64) -> np.ndarray:
+    """Embeddings L2-normalizados (una fila por texto); solo codifica los que no están en caché."""
+    vistos = {}
+    with _EMB_CACHE_LOCK:
+        for t in dict.fromkeys(texts):
+            v = _EMB_CACHE.get((model_name, t))
+            if v is not None:
+                _EMB_CACHE.move_to_end((model_name, t))
+                vistos[t] = v
+    faltan = [t for t in dict.fromkeys(texts) if t not in vistos]
+    if faltan:
+        model = _get_model(model_name)
+        reps = model.encode(
+            faltan,
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        with _EMB_CACHE_LOCK:
+            for t, v in zip(faltan, reps):
+                # copia: una vista de fila mantendría vivo todo el lote `reps` y la LRU no acotaría memoria
+                v = v.copy()
+                vistos[t] = v
+                _EMB_CACHE[(model_name, t)] = v
+            while len(_EMB_CACHE) > _EMB_CACHE_MAX:
+                _EMB_CACHE.popitem(last=False)
+    # se arma con `vistos` (no con la caché): un lote mayor que la LRU no pierde filas
+    return np.stack([vistos[t] for t in texts])
+
+def embedding_cosine_matrix(
+    texts_a: List[str],
+    texts_b: List[str],
+    model_name: str,
+    batch_size: int = 64,
+) -> np.ndarray:
+    """
+    Matriz [len(texts_a) x len(texts_b)] de coseno entre embeddings.
+    Cada lado se codifica una sola vez en lotes de `batch_size` (no 2 textos por llamada)
+    y todo el coseno es un único producto matricial A · Bᵀ.
+    """
+    a = [t or "" for t in texts_a]
+    b = [t or "" for t in texts_b]
+    if not a or not b:
+        return np.zeros((len(a), len(b)))
+    A = _encode(a, model_name, batch_size)
+    B = _encode(b, model_name, batch_size)
+    # Con embeddings normalizados, el coseno = producto punto
+    return np.matmul(A, B.T)
 
 def embedding_cosine_similarity(a: str, b: str, model_name: str) -> float:
     """
@@ -150,9 +318,76 @@ def embedding_cosine_similarity(a: str, b: str, model_name: str) -> float:
       - 'all-MiniLM-L6-v2' (inglés)
       - 'paraphrase-multilingual-MiniLM-L12-v2' (multilingüe)
     """
-    model = _get_model(model_name)
-    reps = model.encode([a or "", b or ""], normalize_embeddings=True)
-    # Con normalize=True, el coseno = dot product
-    v1, v2 = reps[0], reps[1]
-    # producto punto
-    return float((v1 * v2).sum())
+    A = _encode([a or "", b or ""], model_name)  # un solo encode para los dos textos
+    return float(np.dot(A[0], A[1]))              # un sdot de BLAS, sin temporal (v1*v2)
+
+def embedding_cosine_pairs(texts_a: List[str], texts_b: List[str], model_name: str,
+                           batch_size: int = 64) -> np.ndarray:
+    """
+    Coseno fila a fila: out[i] = cos(texts_a[i], texts_b[i]) (pares ya elegidos, no la matriz N x M).
+    einsum('ij,ij->i') reduce cada par en una pasada, sin construir el producto elemento a elemento.
+    """
+    if len(texts_a) != len(texts_b):
+        raise ValueError("texts_a y texts_b deben tener la misma longitud")
+    if not texts_a:
+        return np.zeros(0)
+    A = _encode([t or "" for t in texts_a], model_name, batch_size)
+    B = _encode([t or "" for t in texts_b], model_name, batch_size)
+    return np.einsum("ij,ij->i", A, B)
+
+# -----------------------------
+# Matriz todos-contra-todos
+# -----------------------------
+def _set_similarity_matrix(texts: List[str], sim, n: int, min_sim: float = 0.0) -> np.ndarray:
+    """
+    Métricas simétricas sobre conjuntos: solo se calcula el triángulo superior.
+    Con `min_sim` > 0 los pares que no pueden alcanzarlo quedan en 0 sin intersecar.
+    Los conjuntos se construyen una vez por documento antes del bucle: pasar por la
+    lru_cache de _ngram_set en cada par la desbordaría con N > maxsize (O(N²) tokenizaciones).
+    """
+    sets = [_ngram_set(t or "", n) for t in texts]
+    N = len(sets)
+    S = np.eye(N)
+    for i in range(N):
+        A = sets[i]
+        for j in range(i + 1, N):
+            S[i, j] = S[j, i] = sim(A, sets[j], min_sim)
+    return S
+
+def similarity_matrix(texts: List[str], metric: str = "levenshtein", n: int = 2,
+                      model_name: str = "all-MiniLM-L6-v2", min_sim: float = 0.0) -> np.ndarray:
+    """
+    Matriz [N x N] de similitud para un corpus con una de las métricas:
+      - 'levenshtein'  → rapidfuzz cdist (C, sin GIL, todos los núcleos) si está instalada
+      - 'jaccard'/'dice' → n-gramas cacheados por documento, triángulo superior
+                           (pares con cota superior < min_sim → 0 sin intersecar)
+      - 'cosine_tfidf' → un solo TF-IDF del corpus y X · Xᵀ
+      - 'embedding'    → una pasada de encode por lotes y A · Aᵀ
+    """
+    m = metric.lower()
+    if m == "levenshtein":
+        return levenshtein_similarity_matrix(texts, texts)
+    if m == "jaccard":
+        return _set_similarity_matrix(texts, _jaccard_sets, n, min_sim)
+    if m == "dice":
+        return _set_similarity_matrix(texts, _dice_sets, n, min_sim)
+    if m == "cosine_tfidf":
+        return cosine_tfidf_matrix(texts)
+    if m == "embedding":
+        return embedding_cosine_matrix(texts, texts, model_name)
+    raise ValueError(f"Métrica desconocida: {metric}")
+
+# -----------------------------
+# Precarga en segundo plano
+# -----------------------------
+# Cargar los pesos tarda unos segundos: se lanza al importar, en un hilo daemon, para que
+# el modelo esté listo cuando llegue el primer par (el lock de _get_model evita cargarlo dos
+# veces). SIM_PRELOAD_MODEL=0 lo desactiva (p. ej. en CLIs que no usan embeddings).
+def _preload_model(name: str) -> None:
+    try:
+        _get_model(name)
+    except Exception:
+        pass  # el error real se verá (y se reportará) en la primera llamada síncrona
+
+if _HAS_ST and os.environ.get("SIM_PRELOAD_MODEL", "1").lower() not in ("0", "false", "no", ""):
+    threading.Thread(target=_preload_model, args=("all-MiniLM-L6-v2",), daemon=True).start()